@@ -14,11 +14,17 @@ module.exports = function (app) {
   function run_python_plugin(options) {
       let args = ['plugin.py']
       child = spawn('ve/bin/python', args, { cwd: __dirname })
+      // Deltas are UTF-8, decode across chunks so a character is never split
+      child.stdout.setEncoding('utf8')
 
+      // A chunk can end part-way through a line, keep the tail for the next one
+      let partial = ''
       child.stdout.on('data', data => {
-        app.debug(data.toString())
+        app.debug(data)
+        const lines = (partial + data).split(/\r?\n/)
+        partial = lines.pop()
         try {
-          data.toString().split(/\r?\n/).forEach(line => {
+          lines.forEach(line => {
             // console.log(JSON.stringify(line))
             if (line.length > 0) {
               app.handleMessage(undefined, JSON.parse(line))
@@ -1,13 +1,20 @@
 import argparse
 import asyncio
-import datetime
+import contextlib
 import dataclasses
+import functools
 import json
 import logging
+import random
+import signal
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
 from typing import Any, Callable, Union
 
 from bleak.backends.device import BLEDevice
+from bleak.exc import BleakError
 from victron_ble.devices import (
     AuxMode,
     BatteryMonitorData,
@@ -24,27 +31,512 @@ from victron_ble.devices import (
 from victron_ble.exceptions import AdvertisementKeyMissingError, UnknownDeviceError
 from victron_ble.scanner import Scanner
 
+try:
+    import orjson
+
+    def json_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+except ImportError:
+    # Compact, and without escaping non-ASCII (IDs may contain it)
+    json_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    def json_line(obj: Any) -> bytes:
+        return (json_encode(obj) + "\n").encode()
+
+
 logger = logging.getLogger("signalk-victron-ble")
 
+# Deltas waiting to be written to stdout, before the oldest are dropped
+MAX_QUEUED_DELTAS = 1024
+# Longest wait (in seconds) between attempts to start scanning
+MAX_START_DELAY = 60.0
+
 # 3.9 compatible TypeAliases
 SignalKDelta = dict[str, list[dict[str, Any]]]
 SignalKDeltaValues = list[dict[str, Union[int, float, str, None]]]
 
 
+# SignalK paths published for each device, keyed by group, and expanded to
+# electrical.<group>.<id>.<leaf> once per ConfiguredDevice.
+SIGNALK_PATHS: dict[str, tuple[str, ...]] = {
+    "batteries": (
+        "voltage",
+        "current",
+        "power",
+        "temperature",
+        "capacity.stateOfCharge",
+        "capacity.dischargeSinceFull",
+        "capacity.timeRemaining",
+    ),
+    "converters": (
+        "chargingMode",
+        "chargerError",
+        "chargerOffReason",
+        "input.voltage",
+        "input.current",
+        "output.voltage",
+        "output.current",
+    ),
+    "inverters": (
+        "inverterMode",
+        "dc.voltage",
+        "dc.current",
+        "dc.temperature",
+        "ac.apparentPower",
+        "ac.lineNeutralVoltage",
+        "ac.current",
+    ),
+    "solar": (
+        "voltage",
+        "current",
+        "chargingMode",
+        "panelPower",
+        "loadCurrent",
+        "yieldToday",
+    ),
+}
+
+
 @dataclasses.dataclass
 class ConfiguredDevice:
+    # Declared by hand, as dataclass(slots=True) needs Python >= 3.10
+    __slots__ = (
+        "id",
+        "mac",
+        "advertisement_key",
+        "secondary_battery",
+        "paths",
+        "secondary_battery_path",
+    )
+
     id: str
     mac: str
     advertisement_key: str
     secondary_battery: Union[str, None]
 
+    def __post_init__(self) -> None:
+        # Full SignalK paths, keyed by "<group>.<leaf>", e.g. "batteries.voltage"
+        self.paths: dict[str, str] = {
+            f"{group}.{leaf}": f"electrical.{group}.{self.id}.{leaf}"
+            for group, leaves in SIGNALK_PATHS.items()
+            for leaf in leaves
+        }
+        self.secondary_battery_path: Union[str, None] = None
+        if self.secondary_battery:
+            self.secondary_battery_path = (
+                f"electrical.batteries.{self.secondary_battery}.voltage"
+            )
+
+
+# Advertisements arrive several times a second, so the whole-second part of
+# the timestamp is formatted once and reused until the second changes.
+@functools.lru_cache(maxsize=1)
+def format_utc_second(second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+
+
+def signalk_timestamp() -> str:
+    now = time.time()
+    return "%s.%03dZ" % (format_utc_second(int(now)), int(now % 1 * 1000))
+
+
+# Enums have few members, so lower-case each name once rather than per packet.
+# None for a missing reading, and for a nameless member: combined Flag values
+# such as OffReason(3) have no name before Python 3.11.
+ENUM_NAMES: dict[Enum, str] = {}
+
+
+def enum_name(value: Union[Enum, None]) -> Union[str, None]:
+    if value is None:
+        return None
+    try:
+        return ENUM_NAMES[value]
+    except KeyError:
+        pass
+    name = value.name
+    if not name:
+        return None
+    name = ENUM_NAMES[value] = name.lower()
+    return name
+
+
+def transform_battery_sense_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: BatterySenseData,
+) -> SignalKDeltaValues:
+    return [
+        {
+            "path": cfg_device.paths["batteries.voltage"],
+            "value": data.get_voltage(),
+        },
+        {
+            "path": cfg_device.paths["batteries.temperature"],
+            "value": data.get_temperature() + 273.15,
+        },
+    ]
+
+
+def transform_battery_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: BatteryMonitorData,
+) -> SignalKDeltaValues:
+    voltage = data.get_voltage()
+    current = data.get_current()
+    power = None if voltage is None or current is None else voltage * current
+    soc = data.get_soc()
+    consumed_ah = data.get_consumed_ah()
+    values: SignalKDeltaValues = [
+        {
+            "path": cfg_device.paths["batteries.voltage"],
+            "value": voltage,
+        },
+        {
+            "path": cfg_device.paths["batteries.current"],
+            "value": current,
+        },
+        {
+            "path": cfg_device.paths["batteries.power"],
+            "value": power,
+        },
+        {
+            "path": cfg_device.paths["batteries.capacity.stateOfCharge"],
+            "value": None if soc is None else soc / 100,
+        },
+        {
+            "path": cfg_device.paths["batteries.capacity.dischargeSinceFull"],
+            "value": None if consumed_ah is None else consumed_ah * 3600,
+        },
+    ]
+    if (remaining_mins := data.get_remaining_mins()) is not None:
+        values.append(
+            {
+                "path": cfg_device.paths["batteries.capacity.timeRemaining"],
+                "value": remaining_mins * 60,
+            }
+        )
+
+    aux_mode = data.get_aux_mode()
+    if aux_mode is AuxMode.STARTER_VOLTAGE:
+        if cfg_device.secondary_battery_path:
+            values.append(
+                {
+                    "path": cfg_device.secondary_battery_path,
+                    "value": data.get_starter_voltage(),
+                }
+            )
+    elif aux_mode is AuxMode.TEMPERATURE:
+        if (temperature := data.get_temperature()) is not None:
+            values.append(
+                {
+                    "path": cfg_device.paths["batteries.temperature"],
+                    "value": temperature + 273.15,
+                }
+            )
+
+    return values
+
+
+def transform_dcdc_converter_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: DcDcConverterData,
+) -> SignalKDeltaValues:
+    values: SignalKDeltaValues = [
+        {
+            "path": cfg_device.paths["converters.chargingMode"],
+            "value": enum_name(data.get_charge_state()),
+        },
+        {
+            "path": cfg_device.paths["converters.chargerError"],
+            "value": enum_name(data.get_charger_error()),
+        },
+        {
+            "path": cfg_device.paths["converters.input.voltage"],
+            "value": data.get_input_voltage(),
+        },
+        {
+            "path": cfg_device.paths["converters.output.voltage"],
+            "value": data.get_output_voltage(),
+        },
+    ]
+    if off_reason := enum_name(data.get_off_reason()):
+        values.append(
+            {
+                "path": cfg_device.paths["converters.chargerOffReason"],
+                "value": off_reason,
+            }
+        )
+    return values
+
+
+def transform_inverter_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: InverterData,
+) -> SignalKDeltaValues:
+    values: SignalKDeltaValues = [
+        {
+            "path": cfg_device.paths["inverters.inverterMode"],
+            "value": enum_name(data.get_device_state()),
+        },
+        {
+            "path": cfg_device.paths["inverters.dc.voltage"],
+            "value": data.get_battery_voltage(),
+        },
+        {
+            "path": cfg_device.paths["inverters.ac.apparentPower"],
+            "value": data.get_ac_apparent_power(),
+        },
+        {
+            "path": cfg_device.paths["inverters.ac.lineNeutralVoltage"],
+            "value": data.get_ac_voltage(),
+        },
+        {
+            "path": cfg_device.paths["inverters.ac.current"],
+            "value": data.get_ac_current(),
+        },
+    ]
+    return values
+
+
+def transform_lynx_smart_bms_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: LynxSmartBMSData,
+) -> SignalKDeltaValues:
+    voltage = data.get_voltage()
+    current = data.get_current()
+    power = None if voltage is None or current is None else voltage * current
+    values: SignalKDeltaValues = [
+        {
+            "path": cfg_device.paths["batteries.voltage"],
+            "value": voltage,
+        },
+        {
+            "path": cfg_device.paths["batteries.current"],
+            "value": current,
+        },
+        {
+            "path": cfg_device.paths["batteries.power"],
+            "value": power,
+        },
+    ]
+    if (temperature := data.get_battery_temperature()) is not None:
+        values.append(
+            {
+                "path": cfg_device.paths["batteries.temperature"],
+                "value": temperature + 273.15,
+            }
+        )
+    if (soc := data.get_soc()) is not None:
+        values.append(
+            {
+                "path": cfg_device.paths["batteries.capacity.stateOfCharge"],
+                "value": soc / 100,
+            }
+        )
+    if (consumed_ah := data.get_consumed_ah()) is not None:
+        values.append(
+            {
+                "path": cfg_device.paths["batteries.capacity.dischargeSinceFull"],
+                "value": consumed_ah * 3600,
+            }
+        )
+    if (remaining_mins := data.get_remaining_mins()) is not None:
+        values.append(
+            {
+                "path": cfg_device.paths["batteries.capacity.timeRemaining"],
+                "value": remaining_mins * 60,
+            }
+        )
+    return values
+
+
+def transform_orion_xs_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: OrionXSData,
+) -> SignalKDeltaValues:
+    values: SignalKDeltaValues = [
+        {
+            "path": cfg_device.paths["converters.chargingMode"],
+            "value": enum_name(data.get_charge_state()),
+        },
+        {
+            "path": cfg_device.paths["converters.chargerError"],
+            "value": enum_name(data.get_charger_error()),
+        },
+        {
+            "path": cfg_device.paths["converters.input.voltage"],
+            "value": data.get_input_voltage(),
+        },
+        {
+            "path": cfg_device.paths["converters.input.current"],
+            "value": data.get_input_current(),
+        },
+        {
+            "path": cfg_device.paths["converters.output.voltage"],
+            "value": data.get_output_voltage(),
+        },
+        {
+            "path": cfg_device.paths["converters.output.current"],
+            "value": data.get_output_current(),
+        },
+    ]
+    if off_reason := enum_name(data.get_off_reason()):
+        values.append(
+            {
+                "path": cfg_device.paths["converters.chargerOffReason"],
+                "value": off_reason,
+            }
+        )
+    return values
+
+
+def transform_smart_lithium_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: SmartLithiumData,
+) -> SignalKDeltaValues:
+    values: SignalKDeltaValues = [
+        {
+            "path": cfg_device.paths["batteries.voltage"],
+            "value": data.get_battery_voltage(),
+        },
+    ]
+    if (temperature := data.get_battery_temperature()) is not None:
+        values.append(
+            {
+                "path": cfg_device.paths["batteries.temperature"],
+                "value": temperature + 273.15,
+            }
+        )
+    return values
+
+
+def transform_solar_charger_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: SolarChargerData,
+) -> SignalKDeltaValues:
+    yield_today = data.get_yield_today()
+    return [
+        {
+            "path": cfg_device.paths["solar.voltage"],
+            "value": data.get_battery_voltage(),
+        },
+        {
+            "path": cfg_device.paths["solar.current"],
+            "value": data.get_battery_charging_current(),
+        },
+        {
+            "path": cfg_device.paths["solar.chargingMode"],
+            "value": enum_name(data.get_charge_state()),
+        },
+        {
+            "path": cfg_device.paths["solar.panelPower"],
+            "value": data.get_solar_power(),
+        },
+        {
+            "path": cfg_device.paths["solar.loadCurrent"],
+            "value": data.get_external_device_load(),
+        },
+        {
+            "path": cfg_device.paths["solar.yieldToday"],
+            "value": None if yield_today is None else yield_today * 3600,
+        },
+    ]
+
+
+def transform_ve_bus_data(
+    bl_device: BLEDevice,
+    cfg_device: ConfiguredDevice,
+    data: VEBusData,
+) -> SignalKDeltaValues:
+    values: SignalKDeltaValues = [
+        {
+            "path": cfg_device.paths["inverters.inverterMode"],
+            "value": enum_name(data.get_device_state()),
+        },
+        {
+            "path": cfg_device.paths["inverters.dc.voltage"],
+            "value": data.get_battery_voltage(),
+        },
+        {
+            "path": cfg_device.paths["inverters.dc.current"],
+            "value": data.get_battery_current(),
+        },
+        {
+            "path": cfg_device.paths["inverters.ac.apparentPower"],
+            "value": data.get_ac_out_power(),
+        },
+    ]
+    if (temperature := data.get_battery_temperature()) is not None:
+        values.append(
+            {
+                "path": cfg_device.paths["inverters.dc.temperature"],
+                "value": temperature + 273.15,
+            }
+        )
+    return values
+
+
+Transformer = Callable[[BLEDevice, ConfiguredDevice, Any], SignalKDeltaValues]
+
+TRANSFORMERS: dict[type[DeviceData], Transformer] = {
+    BatteryMonitorData: transform_battery_data,
+    BatterySenseData: transform_battery_sense_data,
+    DcDcConverterData: transform_dcdc_converter_data,
+    InverterData: transform_inverter_data,
+    LynxSmartBMSData: transform_lynx_smart_bms_data,
+    OrionXSData: transform_orion_xs_data,
+    SmartLithiumData: transform_smart_lithium_data,
+    SolarChargerData: transform_solar_charger_data,
+    VEBusData: transform_ve_bus_data,
+}
+
+
+# Resolved through the MRO, so subclasses of a supported DeviceData type (from
+# future victron_ble releases) are handled too. Cached per concrete type,
+# including the types we have no transformer for.
+TRANSFORMERS_BY_TYPE: dict[type[DeviceData], Union[Transformer, None]] = {}
+
+
+def find_transformer(data_type: type[DeviceData]) -> Union[Transformer, None]:
+    try:
+        return TRANSFORMERS_BY_TYPE[data_type]
+    except KeyError:
+        pass
+    transformer = None
+    for base in data_type.__mro__:
+        if base in TRANSFORMERS:
+            transformer = TRANSFORMERS[base]
+            break
+    TRANSFORMERS_BY_TYPE[data_type] = transformer
+    return transformer
+
 
 class SignalKScanner(Scanner):
     _devices: dict[str, ConfiguredDevice]
+    _devices_by_address: dict[str, Union[ConfiguredDevice, None]]
+    _dropped: int
+    _queue: "asyncio.Queue[SignalKDelta]"
+    _sources: dict[str, dict[str, str]]
 
-    def __init__(self, devices: dict[str, ConfiguredDevice]) -> None:
+    def __init__(
+        self,
+        devices: dict[str, ConfiguredDevice],
+        queue: "asyncio.Queue[SignalKDelta]",
+    ) -> None:
         super().__init__()
         self._devices = devices
+        self._devices_by_address = {}
+        self._dropped = 0
+        self._queue = queue
+        self._sources = {}
 
     def load_key(self, address: str) -> str:
         try:
@@ -53,388 +545,156 @@ class SignalKScanner(Scanner):
             raise AdvertisementKeyMissingError(f"No key available for {address}")
 
     def callback(self, bl_device: BLEDevice, raw_data: bytes) -> None:
-        logger.debug(
-            f"Received data from {bl_device.address.lower()}: {raw_data.hex()}"
-        )
+        address = bl_device.address
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received data from %s: %s", address, raw_data.hex())
+        # Memoized by the address as reported, so each MAC (including ones we
+        # aren't configured for) is only normalized once.
         try:
-            device = self.get_device(bl_device, raw_data)
-        except AdvertisementKeyMissingError:
+            configured_device = self._devices_by_address[address]
+        except KeyError:
+            configured_device = self._devices.get(address.lower())
+            self._devices_by_address[address] = configured_device
+        if configured_device is None:
             return
+        try:
+            device = self.get_device(bl_device, raw_data)
         except UnknownDeviceError as e:
             logger.error(e)
             return
         data = device.parse(raw_data)
-        configured_device = self._devices[bl_device.address.lower()]
-        id_ = configured_device.id
-        transformers: dict[
-            type[DeviceData],
-            Callable[[BLEDevice, ConfiguredDevice, Any, str], SignalKDeltaValues],
-        ] = {
-            BatteryMonitorData: self.transform_battery_data,
-            BatterySenseData: self.transform_battery_sense_data,
-            DcDcConverterData: self.transform_dcdc_converter_data,
-            InverterData: self.transform_inverter_data,
-            LynxSmartBMSData: self.transform_lynx_smart_bms_data,
-            OrionXSData: self.transform_orion_xs_data,
-            SmartLithiumData: self.transform_smart_lithium_data,
-            SolarChargerData: self.transform_solar_charger_data,
-            VEBusData: self.transform_ve_bus_data,
-        }
-        for data_type, transformer in transformers.items():
-            if isinstance(data, data_type):
-                values = transformer(bl_device, configured_device, data, id_)
-                delta = self.prepare_signalk_delta(bl_device, values)
-                logger.info(delta)
-                print(json.dumps(delta))
-                sys.stdout.flush()
-                return
+        transformer = find_transformer(type(data))
+        if transformer is None:
+            logger.debug("Unknown device type: %s", type(data).__name__)
+            return
+        values = transformer(bl_device, configured_device, data)
+        delta = self.prepare_signalk_delta(bl_device, values)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s", delta)
+        try:
+            self._queue.put_nowait(delta)
+        except asyncio.QueueFull:
+            # SignalK isn't keeping up with stdout, drop the stalest reading.
+            # Only log when dropping starts and once it stops, not per packet.
+            if not self._dropped:
+                logger.warning("Output queue full, dropping the oldest deltas")
+            self._dropped += 1
+            self._queue.get_nowait()
+            self._queue.put_nowait(delta)
         else:
-            logger.debug("Unknown device", device)
+            if self._dropped:
+                logger.warning(
+                    "Output queue draining again, %d deltas were dropped",
+                    self._dropped,
+                )
+                self._dropped = 0
 
     def prepare_signalk_delta(
         self, bl_device: BLEDevice, values: SignalKDeltaValues
     ) -> SignalKDelta:
+        # The source only depends on the address, so it is built once per
+        # device and shared between deltas.
+        source = self._sources.get(bl_device.address)
+        if source is None:
+            source = self._sources[bl_device.address] = {
+                "label": "Victron",
+                "type": "Bluetooth",
+                "src": bl_device.address,
+            }
         return {
             "updates": [
                 {
-                    "source": {
-                        "label": "Victron",
-                        "type": "Bluetooth",
-                        "src": bl_device.address,
-                    },
-                    "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+                    "source": source,
+                    "timestamp": signalk_timestamp(),
                     "values": values,
                 }
             ]
         }
 
-    def transform_battery_sense_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: BatterySenseData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        return [
-            {
-                "path": f"electrical.batteries.{id_}.voltage",
-                "value": data.get_voltage(),
-            },
-            {
-                "path": f"electrical.batteries.{id_}.temperature",
-                "value": data.get_temperature() + 273.15,
-            },
-        ]
-
-    def transform_battery_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: BatteryMonitorData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        values: SignalKDeltaValues = [
-            {
-                "path": f"electrical.batteries.{id_}.voltage",
-                "value": data.get_voltage(),
-            },
-            {
-                "path": f"electrical.batteries.{id_}.current",
-                "value": data.get_current(),
-            },
-            {
-                "path": f"electrical.batteries.{id_}.power",
-                "value": data.get_voltage() * data.get_current(),
-            },
-            {
-                "path": f"electrical.batteries.{id_}.capacity.stateOfCharge",
-                "value": data.get_soc() / 100,
-            },
-            {
-                "path": f"electrical.batteries.{id_}.capacity.dischargeSinceFull",
-                "value": data.get_consumed_ah() * 3600,
-            },
-        ]
-        if remaining_mins := data.get_remaining_mins():
-            values.append(
-                {
-                    "path": f"electrical.batteries.{id_}.capacity.timeRemaining",
-                    "value": remaining_mins * 60,
-                }
-            )
-
-        if data.get_aux_mode() == AuxMode.STARTER_VOLTAGE:
-            if cfg_device.secondary_battery:
-                values.append(
-                    {
-                        "path": f"electrical.batteries.{cfg_device.secondary_battery}.voltage",
-                        "value": data.get_starter_voltage(),
-                    }
-                )
-        elif data.get_aux_mode() == AuxMode.TEMPERATURE:
-            if temperature := data.get_temperature():
-                values.append(
-                    {
-                        "path": f"electrical.batteries.{id_}.temperature",
-                        "value": temperature + 273.15,
-                    }
-                )
 
-        return values
+def write_deltas(deltas: list[SignalKDelta]) -> None:
+    # A delta can carry any number of updates (each with its own source and
+    # timestamp), so a batch is sent to SignalK as a single message
+    if len(deltas) == 1:
+        delta = deltas[0]
+    else:
+        delta = {"updates": [update for d in deltas for update in d["updates"]]}
+    sys.stdout.buffer.write(json_line(delta))
+    sys.stdout.buffer.flush()
 
-    def transform_dcdc_converter_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: DcDcConverterData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        values: SignalKDeltaValues = [
-            {
-                "path": f"electrical.converters.{id_}.chargingMode",
-                "value": data.get_charge_state().name.lower(),
-            },
-            {
-                "path": f"electrical.converters.{id_}.chargerError",
-                "value": data.get_charger_error().name.lower(),
-            },
-            {
-                "path": f"electrical.converters.{id_}.input.voltage",
-                "value": data.get_input_voltage(),
-            },
-            {
-                "path": f"electrical.converters.{id_}.output.voltage",
-                "value": data.get_output_voltage(),
-            },
-        ]
-        if off_reason := data.get_off_reason().name:
-            values.append(
-                {
-                    "path": f"electrical.converters.{id_}.chargerOffReason",
-                    "value": off_reason.lower(),
-                }
-            )
-        return values
 
-    def transform_inverter_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: InverterData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        values: SignalKDeltaValues = [
-            {
-                "path": f"electrical.inverters.{id_}.inverterMode",
-                "value": data.get_device_state().name.lower(),
-            },
-            {
-                "path": f"electrical.inverters.{id_}.dc.voltage",
-                "value": data.get_battery_voltage(),
-            },
-            {
-                "path": f"electrical.inverters.{id_}.ac.apparentPower",
-                "value": data.get_ac_apparent_power(),
-            },
-            {
-                "path": f"electrical.inverters.{id_}.ac.lineNeutralVoltage",
-                "value": data.get_ac_voltage(),
-            },
-            {
-                "path": f"electrical.inverters.{id_}.ac.current",
-                "value": data.get_ac_current(),
-            },
-        ]
-        return values
+async def writer(
+    queue: "asyncio.Queue[SignalKDelta]", executor: ThreadPoolExecutor
+) -> None:
+    # Encode and write everything that queued up since the last write in one
+    # go, so a burst of advertisements costs a single encode, write and flush.
+    # That happens on the executor's thread, so a slow reader on the other end
+    # of stdout doesn't stall the event loop (and BLE scanning) with it.
+    loop = asyncio.get_running_loop()
+    while True:
+        deltas = [await queue.get()]
+        while not queue.empty():
+            deltas.append(queue.get_nowait())
+        await loop.run_in_executor(executor, write_deltas, deltas)
 
-    def transform_lynx_smart_bms_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: LynxSmartBMSData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        values: SignalKDeltaValues = [
-            {
-                "path": f"electrical.batteries.{id_}.voltage",
-                "value": data.get_voltage(),
-            },
-            {
-                "path": f"electrical.batteries.{id_}.current",
-                "value": data.get_current(),
-            },
-            {
-                "path": f"electrical.batteries.{id_}.power",
-                "value": data.get_voltage() * data.get_current(),
-            },
-        ]
-        if temperature := data.get_battery_temperature():
-            values.append(
-                {
-                    "path": f"electrical.batteries.{id_}.temperature",
-                    "value": temperature + 273.15,
-                }
-            )
-        if soc := data.get_soc():
-            values.append(
-                {
-                    "path": f"electrical.batteries.{id_}.capacity.stateOfCharge",
-                    "value": soc / 100,
-                }
-            )
-        if consumed_ah := data.get_consumed_ah():
-            values.append(
-                {
-                    "path": f"electrical.batteries.{id_}.capacity.dischargeSinceFull",
-                    "value": consumed_ah * 3600,
-                }
-            )
-        if remaining_mins := data.get_remaining_mins():
-            values.append(
-                {
-                    "path": f"electrical.batteries.{id_}.capacity.timeRemaining",
-                    "value": remaining_mins * 60,
-                }
-            )
-        return values
 
-    def transform_orion_xs_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: OrionXSData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        values: SignalKDeltaValues = [
-            {
-                "path": f"electrical.converters.{id_}.chargingMode",
-                "value": data.get_charge_state().name.lower(),
-            },
-            {
-                "path": f"electrical.converters.{id_}.chargerError",
-                "value": data.get_charger_error().name.lower(),
-            },
-            {
-                "path": f"electrical.converters.{id_}.input.voltage",
-                "value": data.get_input_voltage(),
-            },
-            {
-                "path": f"electrical.converters.{id_}.input.current",
-                "value": data.get_input_current(),
-            },
-            {
-                "path": f"electrical.converters.{id_}.output.voltage",
-                "value": data.get_output_voltage(),
-            },
-            {
-                "path": f"electrical.converters.{id_}.output.current",
-                "value": data.get_output_current(),
-            },
-        ]
-        if off_reason := data.get_off_reason().name:
-            values.append(
-                {
-                    "path": f"electrical.converters.{id_}.chargerOffReason",
-                    "value": off_reason.lower(),
-                }
-            )
-        return values
+async def start_scanner(scanner: SignalKScanner) -> None:
+    # Back off exponentially (with jitter) while the adapter is unavailable,
+    # rather than hammering bluetoothd
+    delay = 1.0
+    while True:
+        try:
+            await scanner.start()
+            return
+        except (BleakError, OSError) as e:
+            logger.warning("Failed to start scanning: %s, retrying in %.0fs", e, delay)
+            await asyncio.sleep(delay + random.uniform(0, delay * 0.2))
+            delay = min(delay * 2, MAX_START_DELAY)
 
-    def transform_smart_lithium_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: SmartLithiumData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        values: SignalKDeltaValues = [
-            {
-                "path": f"electrical.batteries.{id_}.voltage",
-                "value": data.get_battery_voltage(),
-            },
-        ]
-        if temperature := data.get_battery_temperature():
-            values.append(
-                {
-                    "path": f"electrical.batteries.{id_}.temperature",
-                    "value": temperature + 273.15,
-                }
-            )
-        return values
 
-    def transform_solar_charger_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: SolarChargerData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        return [
-            {
-                "path": f"electrical.solar.{id_}.voltage",
-                "value": data.get_battery_voltage(),
-            },
-            {
-                "path": f"electrical.solar.{id_}.current",
-                "value": data.get_battery_charging_current(),
-            },
-            {
-                "path": f"electrical.solar.{id_}.chargingMode",
-                "value": data.get_charge_state().name.lower(),
-            },
-            {
-                "path": f"electrical.solar.{id_}.panelPower",
-                "value": data.get_solar_power(),
-            },
-            {
-                "path": f"electrical.solar.{id_}.loadCurrent",
-                "value": data.get_external_device_load(),
-            },
-            {
-                "path": f"electrical.solar.{id_}.yieldToday",
-                "value": data.get_yield_today() * 3600,
-            },
-        ]
+async def monitor(devices: dict[str, ConfiguredDevice]) -> None:
+    queue: asyncio.Queue[SignalKDelta] = asyncio.Queue(maxsize=MAX_QUEUED_DELTAS)
+    scanner = SignalKScanner(devices, queue)
+    await start_scanner(scanner)
+    # A single thread, so writes stay in order
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stdout")
+    writer_task = asyncio.create_task(writer(queue, executor))
 
-    def transform_ve_bus_data(
-        self,
-        bl_device: BLEDevice,
-        cfg_device: ConfiguredDevice,
-        data: VEBusData,
-        id_: str,
-    ) -> SignalKDeltaValues:
-        values: SignalKDeltaValues = [
-            {
-                "path": f"electrical.inverters.{id_}.inverterMode",
-                "value": data.get_device_state().name.lower(),
-            },
-            {
-                "path": f"electrical.inverters.{id_}.dc.voltage",
-                "value": data.get_battery_voltage(),
-            },
-            {
-                "path": f"electrical.inverters.{id_}.dc.current",
-                "value": data.get_battery_current(),
-            },
-            {
-                "path": f"electrical.inverters.{id_}.ac.apparentPower",
-                "value": data.get_ac_out_power(),
-            },
-        ]
-        if temperature := data.get_battery_temperature():
-            values.append(
-                {
-                    "path": f"electrical.inverters.{id_}.dc.temperature",
-                    "value": temperature + 273.15,
-                }
-            )
-        return values
+    # Shut down cleanly on SIGTERM (sent by index.js on stop), so queued
+    # deltas are written out rather than lost
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    signals = (signal.SIGTERM, signal.SIGINT)
+    for sig in signals:
+        loop.add_signal_handler(sig, stop.set)
+    stop_task = asyncio.create_task(stop.wait())
 
+    try:
+        done, _ = await asyncio.wait(
+            {stop_task, writer_task}, return_when=asyncio.FIRST_COMPLETED
+        )
+        # Restore the default handlers, so a second signal can still kill a
+        # shutdown that gets stuck
+        for sig in signals:
+            loop.remove_signal_handler(sig)
+        await scanner.stop()
+        if writer_task in done:
+            # The writer only ever finishes by failing (e.g. stdout is gone).
+            # Exit with its error, so index.js restarts us.
+            writer_task.result()
 
-async def monitor(devices: dict[str, ConfiguredDevice]) -> None:
-    scanner = SignalKScanner(devices)
-    await scanner.start()
-    await asyncio.Event().wait()
+        writer_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await writer_task
+        deltas = []
+        while not queue.empty():
+            deltas.append(queue.get_nowait())
+        if deltas:
+            executor.submit(write_deltas, deltas)
+    finally:
+        stop_task.cancel()
+        # Waits for any write still in progress, then the last batch
+        executor.shutdown(wait=True)
 
 
 def main() -> None: